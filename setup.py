@@ -31,6 +31,11 @@ setup(
     ],
     python_requires=">=3.7",
     install_requires=requirements,
+    extras_require={
+        "fast": ["numba>=0.53.0"],
+        "zstd": ["zstandard>=0.15.0"],
+        "pyvista": ["pyvista>=0.32.0"],
+    },
     keywords="voxel, image processing, 3d, visualization, computer vision",
     project_urls={
         "Bug Reports": "https://github.com/yourusername/image-to-voxel-converter/issues",
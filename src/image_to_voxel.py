@@ -5,15 +5,127 @@ import cv2
 import numpy as np
 import matplotlib.pyplot as plt
 from mpl_toolkits.mplot3d import Axes3D
+import io
+import logging
 import os
+import platform
 from PIL import Image
 import argparse
+from concurrent.futures import ThreadPoolExecutor
+
+# Fixed name so configuration works however the module is imported (e.g. src.image_to_voxel)
+log = logging.getLogger('image_to_voxel')
+
+try:
+    from numba import njit, prange
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+# Bumped whenever the saved layout changes. Version 2 stores positions in the
+# narrowest unsigned dtype that fits the grid (uint8/uint16) instead of int64.
+VOXEL_FORMAT_VERSION = 2
+
+# '.bin' layout: this 16-byte header, then one packed x, y, z, r, g, b record
+# per voxel. Coordinates are uint8 or uint16 as given by coord_size.
+_BIN_MAGIC = b'VOXL'
+_BIN_METHODS = ('height', 'color', 'structure')
+_BIN_HEADER_DTYPE = np.dtype([
+    ('magic', 'S4'),
+    ('version', 'u1'),
+    ('method', 'u1'),
+    ('coord_size', 'u1'),
+    ('reserved', 'u1'),
+    ('grid_shape', '<u2', (3,)),
+    ('padding', 'V2'),
+])
+
+# Grid resolution each method uses when convert_image gets no voxel_resolution
+_DEFAULT_RESOLUTIONS = {'height': 64, 'color': 48, 'structure': 56}
+
+
+def _check_ipp():
+    """Warn if OpenCV on x86 was built without Intel IPP, which backs its fast kernels"""
+    if platform.machine().lower() not in ('x86_64', 'amd64', 'i386', 'i686', 'x86'):
+        return
+    for line in cv2.getBuildInformation().splitlines():
+        name, _, value = line.strip().partition(':')
+        if name == 'Intel IPP' and value.strip() and value.strip().upper() != 'NO':
+            return
+    log.warning("OpenCV was built without Intel IPP; resize, Canny and distanceTransform "
+                "will use slower generic kernels (try the opencv-python wheels)")
+
+
+_check_ipp()
+
+
+def _import_zstd():
+    """Import zstandard on demand; only .npz.zst files need it"""
+    try:
+        import zstandard
+    except ImportError:
+        raise ImportError(".npz.zst files require zstandard (pip install zstandard)")
+    return zstandard
+
+
+if NUMBA_AVAILABLE:
+    # Compiled loop kernels: same [x, y, z] filling as the NumPy paths, but
+    # without the broadcasted temporaries. Parallelized over x.
+
+    _height_kernels = {}
+
+    def _height_kernel(voxel_resolution, max_height):
+        """Return the height kernel compiled for one (resolution, max_height) pair"""
+        key = (voxel_resolution, max_height)
+        if key not in _height_kernels:
+            # Numba freezes closure variables as compile-time constants, so the
+            # loop bounds are known to LLVM and it can unroll/vectorize freely
+            size = voxel_resolution
+            top = max_height
+
+            @njit(parallel=True, cache=True, boundscheck=False, fastmath=True)
+            def _fill_height_nb(heights, resized, offsets, positions, colors):
+                for x in prange(size):
+                    for y in range(size):
+                        i = offsets[x * size + y]
+                        for z in range(min(heights[y, x], top)):
+                            positions[i, 0] = x
+                            positions[i, 1] = y
+                            positions[i, 2] = z
+                            for c in range(3):
+                                colors[i, c] = resized[y, x, c]
+                            i += 1
+
+            _height_kernels[key] = _fill_height_nb
+        return _height_kernels[key]
+
+    @njit(parallel=True, cache=True, boundscheck=False, fastmath=True)
+    def _fill_structure_nb(depth_map, resized, ramp, offsets, positions, colors):
+        n_rows = depth_map.shape[0]
+        for x in prange(depth_map.shape[1]):
+            for y in range(n_rows):
+                i = offsets[x * n_rows + y]
+                for z in range(depth_map[y, x] + 1):
+                    positions[i, 0] = x
+                    positions[i, 1] = y
+                    positions[i, 2] = z
+                    for c in range(3):
+                        colors[i, c] = np.uint8(resized[y, x, c] * ramp[z])
+                    i += 1
+
 
 class ImageToVoxelConverter:
     """Main class for converting images to voxel representations"""
     
-    def __init__(self):
+    def __init__(self, use_numba=False, verbose=False):
         self.supported_methods = ['height', 'color', 'structure', 'all']
+        # Progress goes to the module logger unless verbose asks for console output
+        self.verbose = verbose
+        # The compiled kernels are opt-in: their JIT cost only pays off when one
+        # converter handles many images at the same parameters
+        if use_numba and not NUMBA_AVAILABLE:
+            raise ImportError("use_numba=True requires numba (pip install numba)")
+        self.use_numba = use_numba
     
     def convert_image(self, image_path, method='height', **kwargs):
         """
@@ -24,17 +136,22 @@ class ImageToVoxelConverter:
             method (str): Conversion method ('height', 'color', 'structure', 'all')
             **kwargs: Method-specific parameters
         
+        With method='all' the three methods run concurrently in a thread pool,
+        unless the converter was created with use_numba=True.
+        In that case they run one after another, each kernel using every core.
+        
         Returns:
-            dict: Voxel data and metadata
+            dict: Voxel data and metadata per method. Occupied voxels are stored
+                sparsely as 'positions' (N, 3) [x, y, z] and 'colors' (N, 3) RGB,
+                alongside the dense 'grid_shape' (see unpack_voxels).
         """
         if not os.path.exists(image_path):
             raise FileNotFoundError(f"Image not found: {image_path}")
         
-        # Load image
+        # Load image; it stays BGR and is only resized/converted per resolution
         img_bgr = cv2.imread(image_path)
-        img_rgb = cv2.cvtColor(img_bgr, cv2.COLOR_BGR2RGB)
         
-        print(f"📏 Processing image: {img_rgb.shape[1]} x {img_rgb.shape[0]}")
+        self._report("📏 Processing image: %d x %d", img_bgr.shape[1], img_bgr.shape[0])
         
         results = {}
         
@@ -43,149 +160,404 @@ class ImageToVoxelConverter:
         else:
             methods_to_run = [method]
         
+        # Methods sharing a resolution reuse the same resize and color conversions.
+        # They are all prepared here, before any worker starts, so threads never
+        # race to fill the cache.
+        cache = {}
+        inputs = {m: self._method_inputs(m, img_bgr, kwargs, cache) for m in methods_to_run}
+        
         for m in methods_to_run:
-            print(f"\n🔄 Running {m} method...")
-            
-            if m == 'height':
-                voxels, colors = self._height_based_voxels(
-                    img_rgb, 
-                    kwargs.get('voxel_resolution', 64),
-                    kwargs.get('max_height', 32)
-                )
-            elif m == 'color':
-                voxels, colors = self._color_layered_voxels(
-                    img_rgb,
-                    kwargs.get('voxel_resolution', 48),
-                    kwargs.get('layers', 16)
-                )
-            elif m == 'structure':
-                voxels, colors = self._structure_based_voxels(
-                    img_rgb,
-                    kwargs.get('voxel_resolution', 56),
-                    kwargs.get('depth_levels', 24)
-                )
-            
-            occupied_count = np.sum(voxels)
-            print(f"✅ Created {occupied_count} voxels using {m} method")
-            
-            results[m] = {
-                'voxels': voxels,
-                'colors': colors,
-                'count': occupied_count,
-                'method': m
-            }
+            self._report("\n🔄 Running %s method...", m)
+        
+        # The methods are independent and spend their time in NumPy/OpenCV, which
+        # release the GIL, so 'all' runs them side by side. Only with
+        # use_numba=True do they run in turn on this thread: the kernels already
+        # use every core, and their threading layer must not be driven from
+        # short-lived pool threads.
+        if len(methods_to_run) > 1 and not self.use_numba:
+            with ThreadPoolExecutor(max_workers=len(methods_to_run)) as executor:
+                futures = [executor.submit(self._dispatch, m, img_bgr, kwargs, inputs[m])
+                           for m in methods_to_run]
+                outputs = [future.result() for future in futures]
+        else:
+            outputs = [self._dispatch(m, img_bgr, kwargs, inputs[m]) for m in methods_to_run]
+        
+        for m, voxel_data in zip(methods_to_run, outputs):
+            results[m] = voxel_data
+            self._report("✅ Created %d voxels using %s method", voxel_data['count'], m)
         
         return results
     
-    def _height_based_voxels(self, image, voxel_resolution=64, max_height=32):
-        """Convert image to voxels using brightness as height"""
-        resized = cv2.resize(image, (voxel_resolution, voxel_resolution))
-        gray = cv2.cvtColor(resized, cv2.COLOR_RGB2GRAY)
-        heights = ((gray / 255.0) * max_height).astype(int)
-        
-        voxel_grid = np.zeros((voxel_resolution, voxel_resolution, max_height), dtype=bool)
-        colors = np.zeros((voxel_resolution, voxel_resolution, max_height, 3), dtype=np.uint8)
-        
-        for x in range(voxel_resolution):
-            for y in range(voxel_resolution):
-                height = heights[y, x]
-                if height > 0:
-                    for z in range(height):
-                        voxel_grid[x, y, z] = True
-                        colors[x, y, z] = resized[y, x]
+    def _report(self, message, *args, level=logging.INFO):
+        """Print a progress message when verbose, otherwise log it lazily"""
+        if self.verbose:
+            print(message % args)
+        elif log.isEnabledFor(level):
+            log.log(level, message.lstrip('\n'), *args)
+    
+    def _method_inputs(self, method, image, kwargs, cache):
+        """Resolution and prepared images one method needs, drawn from the shared cache"""
+        res = kwargs.get('voxel_resolution', _DEFAULT_RESOLUTIONS[method])
+        converted = 'hsv' if method == 'color' else 'gray'
+        return {
+            'voxel_resolution': res,
+            'resized': self._prepare(cache, 'rgb', image, res),
+            converted: self._prepare(cache, converted, image, res)
+        }
+    
+    def _dispatch(self, method, image, kwargs, inputs):
+        """Run a single conversion method on its prepared inputs and package the result"""
+        if method == 'height':
+            positions, colors, grid_shape = self._height_based_voxels(
+                image,
+                max_height=kwargs.get('max_height', 32),
+                **inputs
+            )
+        elif method == 'color':
+            positions, colors, grid_shape = self._color_layered_voxels(
+                image,
+                layers=kwargs.get('layers', 16),
+                **inputs
+            )
+        elif method == 'structure':
+            positions, colors, grid_shape = self._structure_based_voxels(
+                image,
+                depth_levels=kwargs.get('depth_levels', 24),
+                **inputs
+            )
         
-        return voxel_grid, colors
+        return {
+            'positions': positions,
+            'colors': colors,
+            'grid_shape': grid_shape,
+            'count': len(positions),
+            'method': method
+        }
+    
+    def _prepare(self, cache, kind, image, voxel_resolution):
+        """
+        Return the BGR image resized and converted to 'bgr', 'rgb', 'gray' or 'hsv',
+        computing it once per resolution
+        """
+        key = (kind, voxel_resolution)
+        if key not in cache:
+            if kind == 'bgr':
+                # INTER_AREA averages source pixels, so downsampling keeps detail
+                cache[key] = cv2.resize(image, (voxel_resolution, voxel_resolution),
+                                        interpolation=cv2.INTER_AREA)
+            elif kind == 'rgb':
+                # Zero-copy channel swizzle; only used to look up voxel colors
+                cache[key] = self._prepare(cache, 'bgr', image, voxel_resolution)[..., ::-1]
+            elif kind == 'gray':
+                cache[key] = cv2.cvtColor(self._prepare(cache, 'bgr', image, voxel_resolution),
+                                          cv2.COLOR_BGR2GRAY)
+            elif kind == 'hsv':
+                cache[key] = cv2.cvtColor(self._prepare(cache, 'bgr', image, voxel_resolution),
+                                          cv2.COLOR_BGR2HSV)
+        return cache[key]
+    
+    def _height_based_voxels(self, image, voxel_resolution=64, max_height=32, resized=None, gray=None):
+        """Convert image to voxels using brightness as height"""
+        cache = {}
+        if resized is None:
+            resized = self._prepare(cache, 'rgb', image, voxel_resolution)
+        if gray is None:
+            gray = self._prepare(cache, 'gray', image, voxel_resolution)
+        # Only 256 gray levels exist, so map them through a table in one OpenCV pass
+        height_lut = ((np.arange(256) / 255.0) * max_height).astype(np.int32)
+        heights = cv2.LUT(gray, height_lut)
+        grid_shape = (voxel_resolution, voxel_resolution, max_height)
+
+        # Grid is indexed [x, y, z] while images are [y, x], hence the transposes.
+        # Each (x, y) column holds a run z = 0..h-1 starting at offsets[x * R + y].
+        counts = heights.T.ravel()
+        offsets = np.cumsum(counts) - counts
+        total = int(counts.sum())
+
+        if self.use_numba:
+            positions = np.empty((total, 3), dtype=np.int32)
+            colors = np.empty((total, 3), dtype=np.uint8)
+            _height_kernel(voxel_resolution, max_height)(heights, resized, offsets, positions, colors)
+            return positions, colors, grid_shape
+
+        positions = self._expand_columns(counts, offsets, voxel_resolution)
+        colors = np.repeat(resized.transpose(1, 0, 2).reshape(-1, 3), counts, axis=0)
+
+        return positions, colors, grid_shape
+
+    def _expand_columns(self, counts, offsets, voxel_resolution):
+        """Positions for columns holding runs z = 0..count-1, in x-major order"""
+        # Every column is expanded straight into the (N, 3) output; empty ones repeat zero times
+        xy = np.indices((voxel_resolution, voxel_resolution)).reshape(2, -1).T
+        zs = np.arange(int(counts.sum())) - np.repeat(offsets, counts)
+        return np.column_stack([np.repeat(xy, counts, axis=0), zs]).astype(np.int32)
     
-    def _color_layered_voxels(self, image, voxel_resolution=48, layers=16):
+    def _color_layered_voxels(self, image, voxel_resolution=48, layers=16, resized=None, hsv=None):
         """Create voxels with different colors at different heights"""
-        resized = cv2.resize(image, (voxel_resolution, voxel_resolution))
-        hsv = cv2.cvtColor(resized, cv2.COLOR_RGB2HSV)
-        
-        voxel_grid = np.zeros((voxel_resolution, voxel_resolution, layers), dtype=bool)
-        colors = np.zeros((voxel_resolution, voxel_resolution, layers, 3), dtype=np.uint8)
-        
-        for x in range(voxel_resolution):
-            for y in range(voxel_resolution):
-                pixel_rgb = resized[y, x]
-                pixel_hsv = hsv[y, x]
-                
-                hue_layer = int((pixel_hsv[0] / 180.0) * layers)
-                hue_layer = min(hue_layer, layers - 1)
-                
-                if pixel_hsv[1] > 30 and pixel_hsv[2] > 30:
-                    voxel_grid[x, y, hue_layer] = True
-                    colors[x, y, hue_layer] = pixel_rgb
-        
-        return voxel_grid, colors
-    
-    def _structure_based_voxels(self, image, voxel_resolution=56, depth_levels=24):
+        cache = {}
+        if resized is None:
+            resized = self._prepare(cache, 'rgb', image, voxel_resolution)
+        if hsv is None:
+            hsv = self._prepare(cache, 'hsv', image, voxel_resolution)
+        
+        # OpenCV hue is 0-179; bucket it through a table in one OpenCV pass
+        hue_lut = np.minimum(((np.arange(256) / 180.0) * layers).astype(np.int32), layers - 1)
+        hue_layer = cv2.LUT(hsv[..., 0], hue_lut)
+        mask = (hsv[..., 1] > 30) & (hsv[..., 2] > 30)
+
+        # At most one voxel per column, at its hue layer, so the sparse voxels
+        # come straight from the mask without building a grid
+        xs, ys = np.nonzero(mask.T)
+        positions = np.column_stack([xs, ys, hue_layer[ys, xs]]).astype(np.int32)
+        colors = resized[ys, xs]
+
+        return positions, colors, (voxel_resolution, voxel_resolution, layers)
+    
+    def _structure_based_voxels(self, image, voxel_resolution=56, depth_levels=24, resized=None, gray=None):
         """Create voxels based on image structure and edges"""
-        resized = cv2.resize(image, (voxel_resolution, voxel_resolution))
-        gray_resized = cv2.cvtColor(resized, cv2.COLOR_RGB2GRAY)
+        cache = {}
+        if resized is None:
+            resized = self._prepare(cache, 'rgb', image, voxel_resolution)
+        if gray is None:
+            gray = self._prepare(cache, 'gray', image, voxel_resolution)
         
-        edges = cv2.Canny(gray_resized, 50, 150)
-        dist_transform = cv2.distanceTransform(255 - edges, cv2.DIST_L2, 5)
+        edges = cv2.Canny(gray, 50, 150)
+        # A 3x3 mask is cheaper than 5x5, and the difference vanishes once the
+        # distances are quantized to depth_levels
+        dist_transform = cv2.distanceTransform(255 - edges, cv2.DIST_L2, 3)
         
         max_dist = np.max(dist_transform)
         if max_dist > 0:
-            depth_map = (dist_transform / max_dist * (depth_levels - 1)).astype(int)
+            depth_map = (dist_transform / max_dist * (depth_levels - 1)).astype(np.int32)
         else:
-            depth_map = np.zeros_like(dist_transform, dtype=int)
-        
-        voxel_grid = np.zeros((voxel_resolution, voxel_resolution, depth_levels), dtype=bool)
-        colors = np.zeros((voxel_resolution, voxel_resolution, depth_levels, 3), dtype=np.uint8)
+            depth_map = np.zeros_like(dist_transform, dtype=np.int32)
         
-        for x in range(voxel_resolution):
-            for y in range(voxel_resolution):
-                max_depth = depth_map[y, x]
-                pixel_color = resized[y, x]
-                
-                for z in range(max_depth + 1):
-                    voxel_grid[x, y, z] = True
-                    color_intensity = 1.0 - (z / max(depth_levels, 1)) * 0.5
-                    colors[x, y, z] = (pixel_color * color_intensity).astype(np.uint8)
+        # Colors darken with depth; the ramp only depends on z so compute it once
+        z_idx = np.arange(depth_levels)
+        ramp = (1.0 - (z_idx / max(depth_levels, 1)) * 0.5).astype(np.float32)
+
+        grid_shape = (voxel_resolution, voxel_resolution, depth_levels)
+
+        # Like the height method, each column is a run z = 0..depth
+        counts = depth_map.T.ravel() + 1
+        offsets = np.cumsum(counts) - counts
+        total = int(counts.sum())
+
+        if self.use_numba:
+            positions = np.empty((total, 3), dtype=np.int32)
+            colors = np.empty((total, 3), dtype=np.uint8)
+            _fill_structure_nb(depth_map, resized, ramp, offsets, positions, colors)
+            return positions, colors, grid_shape
+
+        positions = self._expand_columns(counts, offsets, voxel_resolution)
+        colors = np.repeat(resized.transpose(1, 0, 2).reshape(-1, 3), counts, axis=0)
+        colors = (colors * ramp[positions[:, 2], None]).astype(np.uint8)
+
+        return positions, colors, grid_shape
+    
+    def _pack_occupancy(self, positions, grid_shape):
+        """Pack occupancy into uint64 words, bit z % 64 of word z // 64 per column"""
+        size_x, size_y, size_z = grid_shape
+        n_words = -(-size_z // 64)
+        x, y, z = positions[:, 0], positions[:, 1], positions[:, 2]
+        
+        # OR each voxel's bit straight into its byte, so nothing larger than
+        # the packed result is ever allocated
+        packed = np.zeros(size_x * size_y * n_words * 8, dtype=np.uint8)
+        byte_idx = ((x.astype(np.int64) * size_y + y) * n_words * 8) + (z >> 3)
+        np.bitwise_or.at(packed, byte_idx, (1 << (z & 7)).astype(np.uint8))
+        return packed.view('<u8').reshape(size_x, size_y, n_words)
+    
+    def unpack_voxels(self, voxel_data):
+        """
+        Expand voxels into a dense boolean (x, y, z) grid
         
-        return voxel_grid, colors
+        The bit-packed occupancy is built on first use and kept in
+        voxel_data['occupancy'] for later calls.
+        """
+        if 'occupancy' not in voxel_data:
+            voxel_data['occupancy'] = self._pack_occupancy(voxel_data['positions'], voxel_data['grid_shape'])
+        size_z = voxel_data['grid_shape'][2]
+        bits = np.unpackbits(voxel_data['occupancy'].view(np.uint8), axis=-1, bitorder='little')
+        return bits[..., :size_z].astype(bool)
     
-    def save_voxels(self, voxel_data, output_path):
-        """Save voxel data to file"""
+    def save_voxels(self, voxel_data, output_path, compress=True):
+        """
+        Save voxel data to file
+        
+        Args:
+            voxel_data (dict): One method's result from convert_image
+            output_path (str): '.npz', '.npz.zst' (zstd-compressed, multi-threaded) or '.bin'
+            compress (bool): Deflate-compress '.npz' output; False writes it raw
+        """
         os.makedirs(os.path.dirname(output_path), exist_ok=True)
         
-        if output_path.endswith('.npz'):
-            occupied = np.where(voxel_data['voxels'])
-            np.savez_compressed(
-                output_path,
-                positions=np.column_stack(occupied),
-                colors=voxel_data['colors'][occupied],
-                grid_shape=voxel_data['voxels'].shape,
-                method=voxel_data['method']
-            )
-        elif output_path.endswith('.bin'):
+        if output_path.endswith('.bin'):
             self._save_binary_format(voxel_data, output_path)
+            self._report("✅ Saved voxel data: %s", output_path)
+            return
         
-        print(f"✅ Saved voxel data: {output_path}")
+        arrays = {
+            'positions': self._compact_positions(voxel_data['positions'], voxel_data['grid_shape']),
+            'colors': voxel_data['colors'],
+            'grid_shape': voxel_data['grid_shape'],
+            'method': voxel_data['method'],
+            'version': VOXEL_FORMAT_VERSION
+        }
+        
+        if output_path.endswith('.npz.zst'):
+            zstd = _import_zstd()
+            buf = io.BytesIO()
+            np.savez(buf, **arrays)
+            with open(output_path, 'wb') as f:
+                f.write(zstd.ZstdCompressor(level=3, threads=-1).compress(buf.getvalue()))
+        elif output_path.endswith('.npz'):
+            if compress:
+                np.savez_compressed(output_path, **arrays)
+            else:
+                np.savez(output_path, **arrays)
+        
+        self._report("✅ Saved voxel data: %s", output_path)
+    
+    def _binary_record_dtype(self, coord_dtype):
+        """One packed record per voxel: x, y, z followed by r, g, b"""
+        return np.dtype([('x', coord_dtype), ('y', coord_dtype), ('z', coord_dtype),
+                         ('r', 'u1'), ('g', 'u1'), ('b', 'u1')])
     
-    def visualize_3d(self, voxel_data, max_voxels=8000):
-        """Create 3D visualization of voxels"""
-        voxel_grid = voxel_data['voxels']
+    def _save_binary_format(self, voxel_data, output_path):
+        """Stream voxels into a memory-mapped '.bin' file (16-byte header + packed records)"""
+        positions = voxel_data['positions']
         colors = voxel_data['colors']
+        grid_shape = voxel_data['grid_shape']
         
-        occupied = np.where(voxel_grid)
+        if max(grid_shape) > 65535:
+            raise ValueError(f"Grid too large for the binary format: {grid_shape}")
         
-        if len(occupied[0]) == 0:
-            print("❌ No voxels to display")
+        coord_dtype = self._position_dtype(grid_shape).newbyteorder('<')
+        
+        header = np.zeros(1, dtype=_BIN_HEADER_DTYPE)
+        header['magic'] = _BIN_MAGIC
+        header['version'] = VOXEL_FORMAT_VERSION
+        header['method'] = _BIN_METHODS.index(voxel_data['method'])
+        header['coord_size'] = coord_dtype.itemsize
+        header['grid_shape'] = grid_shape
+        
+        with open(output_path, 'wb') as f:
+            f.write(header.tobytes())
+        
+        if len(positions) == 0:
+            return
+        
+        # Fill each field straight into the mapped file, so no packed copy of
+        # the records is ever built in memory
+        records = np.memmap(output_path, dtype=self._binary_record_dtype(coord_dtype), mode='r+',
+                            offset=_BIN_HEADER_DTYPE.itemsize, shape=(len(positions),))
+        for i, field in enumerate(('x', 'y', 'z')):
+            records[field] = positions[:, i]
+        for i, field in enumerate(('r', 'g', 'b')):
+            records[field] = colors[:, i]
+        records.flush()
+        del records
+    
+    def _load_binary_format(self, input_path):
+        """Read a '.bin' file written by _save_binary_format"""
+        header = np.fromfile(input_path, dtype=_BIN_HEADER_DTYPE, count=1)
+        if len(header) == 0 or header['magic'][0] != _BIN_MAGIC:
+            raise ValueError(f"Not a voxel binary file: {input_path}")
+        
+        coord_dtype = {1: '<u1', 2: '<u2'}[int(header['coord_size'][0])]
+        records = np.fromfile(input_path, dtype=self._binary_record_dtype(coord_dtype),
+                              offset=_BIN_HEADER_DTYPE.itemsize)
+        
+        positions = np.column_stack([records['x'], records['y'], records['z']]).astype(np.int32)
+        colors = np.column_stack([records['r'], records['g'], records['b']])
+        return positions, colors, tuple(int(n) for n in header['grid_shape'][0]), _BIN_METHODS[int(header['method'][0])]
+    
+    def _position_dtype(self, grid_shape):
+        """Smallest unsigned dtype that can index every axis of the grid"""
+        largest = max(grid_shape)
+        if largest <= 256:
+            return np.dtype(np.uint8)
+        elif largest <= 65536:
+            return np.dtype(np.uint16)
+        return np.dtype(np.int32)
+    
+    def _compact_positions(self, positions, grid_shape):
+        """Downcast positions to the smallest dtype that fits the grid"""
+        return positions.astype(self._position_dtype(grid_shape), copy=False)
+    
+    def load_voxels(self, input_path):
+        """Load voxel data saved by save_voxels ('.npz', '.npz.zst' or '.bin')"""
+        if not os.path.exists(input_path):
+            raise FileNotFoundError(f"Voxel file not found: {input_path}")
+        
+        if input_path.endswith('.bin'):
+            positions, colors, grid_shape, method = self._load_binary_format(input_path)
+        else:
+            if input_path.endswith('.npz.zst'):
+                zstd = _import_zstd()
+                with open(input_path, 'rb') as f:
+                    source = io.BytesIO(zstd.ZstdDecompressor().decompress(f.read()))
+            else:
+                source = input_path
+            
+            with np.load(source) as data:
+                # Files from before version 2 hold int64 positions, newer ones uint8/uint16;
+                # widen both to the int32 layout convert_image produces
+                positions = data['positions'].astype(np.int32)
+                colors = data['colors']
+                grid_shape = tuple(int(n) for n in data['grid_shape'])
+                method = str(data['method'])
+        
+        return {
+            'positions': positions,
+            'colors': colors,
+            'grid_shape': grid_shape,
+            'count': len(positions),
+            'method': method
+        }
+    
+    def visualize_3d(self, voxel_data, max_voxels=8000, backend='matplotlib'):
+        """
+        Create 3D visualization of voxels
+        
+        Args:
+            voxel_data (dict): One method's result from convert_image
+            max_voxels (int): Randomly subsample to at most this many voxels (None shows all)
+            backend (str): 'matplotlib', or 'pyvista' to render on the GPU, which stays
+                interactive with far more points
+        """
+        if backend not in ('matplotlib', 'pyvista'):
+            raise ValueError(f"Unknown backend: {backend}")
+        
+        positions = voxel_data['positions']
+        colors = voxel_data['colors']
+        
+        if len(positions) == 0:
+            self._report("❌ No voxels to display", level=logging.WARNING)
             return
         
-        if len(occupied[0]) > max_voxels:
-            indices = np.random.choice(len(occupied[0]), max_voxels, replace=False)
-            occupied = (occupied[0][indices], occupied[1][indices], occupied[2][indices])
+        if max_voxels is not None and len(positions) > max_voxels:
+            # Generator.choice with shuffle=False avoids permuting all N indices
+            # like the legacy np.random.choice; for small samples of large point
+            # sets it also skips allocating them
+            rng = np.random.default_rng()
+            indices = rng.choice(len(positions), size=max_voxels, replace=False, shuffle=False)
+            positions = positions[indices]
+            colors = colors[indices]
+        
+        if backend == 'pyvista':
+            self._visualize_pyvista(positions, colors)
+            return
         
-        voxel_colors = colors[occupied] / 255.0
+        # float32 is plenty for matplotlib's 0-1 RGB and half the size of float64
+        voxel_colors = colors.astype(np.float32)
+        voxel_colors *= np.float32(1 / 255.0)
         
         fig = plt.figure(figsize=(12, 10))
         ax = fig.add_subplot(111, projection='3d')
         
-        ax.scatter(occupied[0], occupied[1], occupied[2], 
+        ax.scatter(positions[:, 0], positions[:, 1], positions[:, 2], 
                   c=voxel_colors, s=20, alpha=0.8)
         
         ax.set_xlabel('X')
@@ -195,6 +567,17 @@ class ImageToVoxelConverter:
         
         plt.tight_layout()
         plt.show()
+    
+    def _visualize_pyvista(self, positions, colors):
+        """Render voxels as a VTK point cloud"""
+        try:
+            import pyvista as pv
+        except ImportError:
+            raise ImportError("backend='pyvista' requires pyvista (pip install pyvista)")
+        
+        cloud = pv.PolyData(positions.astype(np.float32))
+        cloud['colors'] = colors.astype(np.uint8, copy=False)
+        cloud.plot(scalars='colors', rgb=True, point_size=5, render_points_as_spheres=True)
 
 def main():
     parser = argparse.ArgumentParser(description='Convert image to voxel representation')
@@ -204,10 +587,12 @@ def main():
                        help='Conversion method')
     parser.add_argument('--resolution', '-r', type=int, default=64, help='Voxel grid resolution')
     parser.add_argument('--visualize', '-v', action='store_true', help='Show 3D visualization')
+    parser.add_argument('--backend', '-b', default='matplotlib', choices=['matplotlib', 'pyvista'],
+                       help='Visualization backend')
     
     args = parser.parse_args()
     
-    converter = ImageToVoxelConverter()
+    converter = ImageToVoxelConverter(verbose=True)
     
     try:
         results = converter.convert_image(
@@ -223,7 +608,7 @@ def main():
             converter.save_voxels(voxel_data, output_file)
             
             if args.visualize:
-                converter.visualize_3d(voxel_data)
+                converter.visualize_3d(voxel_data, backend=args.backend)
         
         print(f"\n✅ Conversion complete! Results saved to {args.output}")
         